@@ -25,7 +25,6 @@ from math import ceil
 from pathlib import Path
 from typing import Any, BinaryIO, Optional, Union
 
-import zstandard as zstd
 from penlog import MessagePrio, RecordType
 
 from gallia.uds.core.service import NegativeResponse, UDSRequest, UDSResponse
@@ -257,6 +256,9 @@ class CursedHR:
                 file = tempfile.TemporaryFile()  # pylint: disable=consider-using-with
 
                 if self.in_file.suffix == ".zst":
+                    # Only pay for loading zstandard when it is needed.
+                    import zstandard as zstd  # pylint: disable=import-outside-toplevel
+
                     with self.in_file.open("rb") as in_file:
                         decomp = zstd.ZstdDecompressor()
                         decomp.copy_stream(in_file, file)
@@ -29,6 +29,8 @@ class Logger(penlog.Logger):
         )
 
     def log_read(self, data: Any, tags: Optional[list[str]] = None) -> None:
+        if not self.is_enabled_for(penlog.MessagePrio.DEBUG):
+            return
         self.log_msg(
             data,
             MessageType.READ,
@@ -38,6 +40,8 @@ class Logger(penlog.Logger):
         )
 
     def log_write(self, data: Any, tags: Optional[list[str]] = None) -> None:
+        if not self.is_enabled_for(penlog.MessagePrio.DEBUG):
+            return
         self.log_msg(
             data,
             MessageType.WRITE,
@@ -57,5 +61,8 @@ class Logger(penlog.Logger):
 
 
 class DiscardLogger(Logger):
+    def is_enabled_for(self, prio: penlog.MessagePrio) -> bool:
+        return False
+
     def _log(self, msg: penlog.RecordType, depth: int) -> None:
         pass
@@ -20,6 +20,10 @@ class TestXCP(Scanner):
         await transport.connect(None)
         service = XCPService(transport)
 
+        # These must stay sequential: XCP is strictly request/response,
+        # each request holds the transport mutex, and the later
+        # commands parse their responses with the byte order negotiated
+        # during connect.
         await catch_and_log_exception(self.logger, service.connect)
         await catch_and_log_exception(self.logger, service.get_status)
         await catch_and_log_exception(self.logger, service.get_comm_mode_info)
@@ -2,18 +2,21 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
-import inspect
 import json
 import os
 import socket
 import sys
+import time
 import traceback
 import uuid
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum, IntEnum, unique
+from functools import lru_cache
 from typing import Any, TextIO, Optional
 
+_HOSTNAME = socket.gethostname()
+
 
 @unique
 class MessageType(str, Enum):
@@ -33,6 +36,9 @@ class MessagePrio(IntEnum):
     TRACE = 8
 
 
+_PRIO_VALUES = frozenset(prio.value for prio in MessagePrio)
+
+
 @unique
 class OutputType(Enum):
     JSON = "json"
@@ -78,13 +84,74 @@ def colorize(color: Color, s: str) -> str:
 
 
 def _get_line_number(depth: int) -> str:
-    stack = inspect.stack()
-    frame = stack[depth]
-    return f"{frame.filename}:{frame.lineno}"
+    # inspect.stack() would resolve source context for every frame
+    # through linecache; only the caller's position is needed here.
+    frame = sys._getframe(depth)  # pylint: disable=protected-access
+    return f"{frame.f_code.co_filename}:{frame.f_lineno}"
+
+
+@lru_cache(maxsize=64)
+def _format_iso_seconds(secs: int) -> tuple[str, str]:
+    st = time.localtime(secs)
+    # The offset is derived per second, so DST changes during long
+    # runs are reflected in the timestamps.
+    sign = "+" if st.tm_gmtoff >= 0 else "-"
+    hours, minutes = divmod(abs(st.tm_gmtoff) // 60, 60)
+    return time.strftime("%Y-%m-%dT%H:%M:%S", st), f"{sign}{hours:02d}:{minutes:02d}"
+
+
+def _timestamp() -> str:
+    # Equivalent to datetime.now().astimezone().isoformat(), but without
+    # allocating datetime/timezone objects per record. Only the
+    # microseconds change between records within the same second.
+    t = time.time()
+    secs = int(t)
+    seconds, offset = _format_iso_seconds(secs)
+    return f"{seconds}.{int((t - secs) * 1_000_000):06d}{offset}"
+
+
+def _style(*colors: Color) -> tuple[str, str]:
+    prefix = "".join(color.value for color in colors)
+    return prefix, Color.RESET.value * len(colors)
+
+
+# Precomputed escape sequences, equivalent to nested colorize() calls.
+_STYLES: dict[MessagePrio, tuple[str, str]] = {
+    MessagePrio.EMERGENCY: _style(Color.BOLD, Color.RED),
+    MessagePrio.ALERT: _style(Color.BOLD, Color.RED),
+    MessagePrio.CRITICAL: _style(Color.BOLD, Color.RED),
+    MessagePrio.ERROR: _style(Color.BOLD, Color.RED),
+    MessagePrio.WARNING: _style(Color.BOLD, Color.YELLOW),
+    MessagePrio.NOTICE: _style(Color.BOLD),
+    MessagePrio.INFO: _style(),
+    MessagePrio.DEBUG: _style(Color.GRAY),
+    MessagePrio.TRACE: _style(Color.GRAY),
+}
+# Equivalent to colorize(Color.GRAY, f" | {line}\n") for each line.
+_STACKTRACE_STYLE = (f"{Color.GRAY.value} | ", f"\n{Color.RESET.value}")
+_STACKTRACE_PLAIN = (" | ", "\n")
+# MessagePrio values are dense, starting at 0; index by priority directly.
+_PRIO_STYLES = tuple(_STYLES[prio] for prio in sorted(MessagePrio))
+
+
+@lru_cache(maxsize=64)
+def _format_hr_seconds(timestamp: str) -> str:
+    return datetime.fromisoformat(timestamp).strftime("%b %d %H:%M:%S")
+
+
+def _format_hr_timestamp(timestamp: str) -> str:
+    # Records arrive in bursts within the same second; only the
+    # millisecond part differs. Cache the expensive parse + strftime
+    # of the "YYYY-MM-DDTHH:MM:SS" prefix and splice the rest in.
+    millis = timestamp[20:23] if timestamp[19:20] == "." else "000"
+    return f"{_format_hr_seconds(timestamp[:19])}.{millis}"
+
+
+_TRUE_STRINGS = frozenset({"true", "1", "t", "y"})
 
 
 def str2bool(s: str) -> bool:
-    return s.lower() in ["true", "1", "t", "y"]
+    return s.lower() in _TRUE_STRINGS
 
 
 class HRFormatter:
@@ -103,25 +170,16 @@ class HRFormatter:
         self.show_stacktraces = show_stacktraces
         self.show_tags = show_tags
         self.output_type = output_type
+        # The trailing detail lines are disabled in the common case;
+        # decide once instead of probing each option per record.
+        self.show_details = show_ids or show_lines or show_stacktraces or show_tags
 
     @staticmethod
     def _colorize_data(data: str, prio: MessagePrio) -> str:
-        if prio in (
-            MessagePrio.EMERGENCY,
-            MessagePrio.ALERT,
-            MessagePrio.CRITICAL,
-            MessagePrio.ERROR,
-        ):
-            data = colorize(Color.BOLD, colorize(Color.RED, data))
-        elif prio == MessagePrio.WARNING:
-            data = colorize(Color.BOLD, colorize(Color.YELLOW, data))
-        elif prio == MessagePrio.NOTICE:
-            data = colorize(Color.BOLD, data)
-        elif prio == MessagePrio.INFO:
-            pass
-        elif prio in (MessagePrio.DEBUG, MessagePrio.TRACE):
-            data = colorize(Color.GRAY, data)
-        return data
+        if not 0 <= prio < len(_PRIO_STYLES):
+            return data
+        prefix, suffix = _PRIO_STYLES[prio]
+        return f"{prefix}{data}{suffix}"
 
     def format(self, msg: RecordType) -> str:
         assert self.output_type in (
@@ -131,48 +189,48 @@ class HRFormatter:
         )
 
         out = ""
-        ts = datetime.fromisoformat(msg.timestamp)
-        ts_formatted = ts.strftime("%b %d %H:%M:%S.%f")[:-3]
         component = msg.component
         msgtype = msg.type
         data = msg.data
         if self.show_colors:
-            prio = MessagePrio(msg.priority)
-            data = self._colorize_data(data, prio)
+            data = self._colorize_data(data, msg.priority)
 
         if self.output_type == OutputType.HR_TINY:
+            ts_formatted = _format_hr_timestamp(msg.timestamp)
             out = f"{ts_formatted}: {data}"
         elif self.output_type == OutputType.HR_NANO:
             out = f"{data}"
         elif self.output_type == OutputType.HR:
+            ts_formatted = _format_hr_timestamp(msg.timestamp)
             out = f"{ts_formatted} {{{component: <8}}} [{msgtype: <8}]: {data}"
         else:
             raise ValueError("BUG: this code should not be reachable")
 
+        if self.show_details:
+            out += self._format_details(msg)
+        return out
+
+    def _format_details(self, msg: RecordType) -> str:
+        # Collect the fragments and join once; repeated string
+        # concatenation is quadratic for long stacktraces.
+        parts = []
         if self.show_ids and msg.id is not None:
-            out += "\n"
-            if self.show_colors:
-                out += f" => id  : {colorize(Color.YELLOW, msg.id)}"
-            else:
-                out += f" => id  : {msg.id}"
+            id_ = colorize(Color.YELLOW, msg.id) if self.show_colors else msg.id
+            parts.append(f"\n => id  : {id_}")
         if self.show_lines and msg.line is not None:
-            out += "\n"
-            if self.show_colors:
-                out += f" => line: {colorize(Color.BLUE, msg.line)}"
-            else:
-                out += f" => line: {msg.line}"
+            line = colorize(Color.BLUE, msg.line) if self.show_colors else msg.line
+            parts.append(f"\n => line: {line}")
         if self.show_tags and msg.tags is not None:
-            out += "\n"
-            out += f" => tags: {' '.join(msg.tags)}"
+            parts.append(f"\n => tags: {' '.join(msg.tags)}")
         if self.show_stacktraces and msg.stacktrace is not None:
-            out += "\n"
-            out += " => stacktrace:\n"
-            for line in msg.stacktrace.splitlines():
-                if self.show_colors:
-                    out += colorize(Color.GRAY, f" | {line}\n")
-                else:
-                    out += f" | {line}\n"
-        return out
+            parts.append("\n => stacktrace:\n")
+            prefix, suffix = (
+                _STACKTRACE_STYLE if self.show_colors else _STACKTRACE_PLAIN
+            )
+            parts.extend(
+                f"{prefix}{line}{suffix}" for line in msg.stacktrace.splitlines()
+            )
+        return "".join(parts)
 
 
 class Logger:
@@ -186,7 +244,7 @@ class Logger:
         show_colors: bool = True,
         include_uuid: bool = False,
     ):
-        self.host = socket.gethostname()
+        self.host = _HOSTNAME
         self.component = component
         self.flush = flush
         self.file = file_
@@ -233,37 +291,42 @@ class Logger:
             output_type=self.output_type,
         )
 
+    def is_enabled_for(self, prio: MessagePrio) -> bool:
+        """Returns whether a message with priority prio would be logged.
+        Callers can use this to skip building expensive log payloads."""
+        # Priorities outside of MessagePrio are never filtered.
+        return prio <= self.loglevel or prio not in _PRIO_VALUES
+
     def _log(self, msg: RecordType, depth: int) -> None:
-        try:
-            prio = MessagePrio(msg.priority)
-            if prio > self.loglevel:
-                return
-        except ValueError:
-            pass
         if self.include_uuid:
             msg.id = str(uuid.uuid4())
-        msg.component = self.component
-        msg.host = self.host
-        now = datetime.now().astimezone()
-        msg.timestamp = now.isoformat()
+        # hr-nano, the default output, does not show timestamps.
+        if self.output_type != OutputType.HR_NANO:
+            msg.timestamp = _timestamp()
         if self.lines:
             msg.line = _get_line_number(depth)
         if self.stacktraces:
             msg.stacktrace = "".join(traceback.format_stack())
         if self.output_type == OutputType.JSON:
-            print(json.dumps(asdict(msg)), file=self.file, flush=self.flush)
+            out = json.dumps(vars(msg))
         elif self.output_type == OutputType.JSON_PRETTY:
-            print(json.dumps(asdict(msg), indent=2), file=self.file, flush=self.flush)
+            out = json.dumps(vars(msg), indent=2)
         elif self.output_type in (
             OutputType.HR,
             OutputType.HR_TINY,
             OutputType.HR_NANO,
         ):
             out = self.hr_formatter.format(msg)
-            print(out, file=self.file, flush=self.flush)
         else:
             raise RuntimeError("BUG: invalid penlog output")
 
+        # Emit the record and its line terminator with a single write;
+        # print() issues one write per argument plus one for the
+        # terminator.
+        self.file.write(f"{out}\n")
+        if self.flush:
+            self.file.flush()
+
     def log_msg(
         self,
         data: Any,
@@ -272,10 +335,15 @@ class Logger:
         tags: Optional[list[str]] = None,
         _depth: int = 3,
     ) -> None:
+        # Filter before anything is allocated or stringified; disabled
+        # levels (e.g. DEBUG reads/writes) are the common case.
+        if not self.is_enabled_for(prio):
+            return
+
         msg = RecordType(
-            component="",
+            component=self.component,
             data=str(data),
-            host="",
+            host=self.host,
             id=None,
             line=None,
             priority=prio,
@@ -309,5 +377,8 @@ class Logger:
 
 
 class DiscardLogger(Logger):
+    def is_enabled_for(self, prio: MessagePrio) -> bool:
+        return False
+
     def _log(self, msg: RecordType, depth: int) -> None:
         pass
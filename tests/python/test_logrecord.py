@@ -5,6 +5,7 @@
 import json
 import os
 import socket
+from datetime import datetime, timedelta
 from io import StringIO
 
 import penlog
@@ -46,3 +47,40 @@ def test_log_json(logger_json: penlog.Logger) -> None:
     assert record["host"] == socket.gethostname()
     assert record["priority"] == penlog.MessagePrio.WARNING
     assert record["type"] == "message"
+
+
+def test_log_filtered(logger_json: penlog.Logger) -> None:
+    logger_json.log_debug("foo")
+    logger_json.file.seek(0)
+    assert logger_json.file.read() == ""
+
+
+def test_log_line(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("PENLOG_OUTPUT", "json")
+    monkeypatch.setenv("PENLOG_CAPTURE_LINES", "true")
+    logger = create_logger()
+    logger.log_warning("foo")
+    logger.file.seek(0)
+    record = json.loads(logger.file.read())
+
+    assert record["line"].startswith(f"{__file__}:")
+
+
+def test_log_discard() -> None:
+    buffer = StringIO()
+    logger = penlog.DiscardLogger("pytest", file_=buffer)
+    logger.log_critical("foo")
+    assert not logger.is_enabled_for(penlog.MessagePrio.CRITICAL)
+    assert buffer.getvalue() == ""
+
+
+def test_log_timestamp(logger_json: penlog.Logger) -> None:
+    before = datetime.now().astimezone()
+    logger_json.log_warning("foo")
+    after = datetime.now().astimezone()
+    logger_json.file.seek(0)
+    record = json.loads(logger_json.file.read())
+    ts = datetime.fromisoformat(record["timestamp"])
+
+    assert ts.utcoffset() == before.utcoffset()
+    assert before - timedelta(microseconds=1) <= ts <= after